@@ -0,0 +1,38 @@
+import asyncio
+import hashlib
+from datetime import datetime
+from typing import Any, Awaitable, Callable
+
+from cachetools import TTLCache
+
+
+async def cached_fetch(cache: TTLCache, key: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+    """Return a cached fetch, sharing one in-flight Twilio call between concurrent readers"""
+    task = cache.get(key)
+    if task is None:
+        task = cache[key] = asyncio.ensure_future(fetch())
+
+        def evict_failed(done: asyncio.Future) -> None:
+            # Runs even if every waiting caller was cancelled, so failures are
+            # always retrieved and never served from the cache
+            if done.cancelled() or done.exception() is not None:
+                if cache.get(key) is done:
+                    cache.pop(key, None)
+
+        task.add_done_callback(evict_failed)
+
+    # Shield so one disconnecting caller doesn't cancel the fetch for the rest
+    return await asyncio.shield(task)
+
+
+def etag(sid: str, date_updated: datetime | None) -> str:
+    """Build a strong ETag that changes whenever Twilio updates the resource"""
+    version = date_updated.isoformat() if date_updated else ""
+    return '"%s"' % hashlib.blake2b((sid + version).encode(), digest_size=8).hexdigest()
+
+
+def not_modified(if_none_match: str | None, tag: str) -> bool:
+    """Check an If-None-Match header against the current ETag"""
+    if not if_none_match:
+        return False
+    return if_none_match.strip() == "*" or tag in (t.strip().removeprefix("W/") for t in if_none_match.split(","))
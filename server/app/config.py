@@ -0,0 +1,23 @@
+import os
+from dataclasses import dataclass, fields
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+@dataclass(frozen=True)
+class Settings:
+    """Twilio credentials, read once from the environment at import"""
+    account_sid: str | None = os.getenv("TWILIO_ACCOUNT_SID")
+    auth_token: str | None = os.getenv("TWILIO_AUTH_TOKEN")
+    api_key_sid: str | None = os.getenv("TWILIO_API_KEY_SID")
+    api_key_secret: str | None = os.getenv("TWILIO_API_KEY_SECRET")
+    conversations_service_sid: str | None = os.getenv("TWILIO_CONVERSATIONS_SERVICE_SID")
+
+    def validate(self) -> None:
+        missing = [f.name for f in fields(self) if not getattr(self, f.name)]
+        if missing:
+            raise RuntimeError(f"Twilio credentials not configured: {', '.join(missing)}")
+
+
+settings = Settings()
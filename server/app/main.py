@@ -1,28 +1,36 @@
-import os
-
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
+from fastapi.responses import ORJSONResponse
 from contextlib import asynccontextmanager
-from fastapi.middleware.cors import CORSMiddleware
-from dotenv import load_dotenv
+from twilio.rest import Client
 
+from config import settings
+from middleware import OriginCORSMiddleware
 from routers import chat, video
+from twilio_http import HttpxTwilioHttpClient
 
-load_dotenv()
+# Encoded once, health probes hit this constantly
+HEALTH = b'{"status":"up"}'
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     print("Starting Twilio API server...")
+    settings.validate()
+
+    # One client per process so connections stay warm across requests
+    app.state.twilio = Client(settings.account_sid, settings.auth_token, http_client=HttpxTwilioHttpClient())
     yield
+    await app.state.twilio.http_client.close()
     print("Shutting down Twilio API server...")
 
 def create_app() -> FastAPI:
     app = FastAPI(
         title="Twilio Chat & Video API",
-        lifespan=lifespan
+        lifespan=lifespan,
+        default_response_class=ORJSONResponse
     )
 
     app.add_middleware(
-        CORSMiddleware,
+        OriginCORSMiddleware,
         allow_origins=["http://localhost:5173"],
         allow_credentials=True,
         allow_methods=["GET", "POST", "PUT", "DELETE"],
@@ -33,10 +41,11 @@ def create_app() -> FastAPI:
     app.include_router(video.router, prefix="/api/video", tags=["Video"])
 
     @app.get("/")
-    def root():
-        return {"status": "up"}
+    async def root():
+        return Response(content=HEALTH, media_type="application/json")
 
     return app
 
-# uvicorn main:app --host 0.0.0.0 --port 6969 --reload
+# Dev:  uvicorn main:app --host 0.0.0.0 --port 6969 --reload
+# Prod: uvicorn main:app --host 0.0.0.0 --port 6969 --workers $WORKERS --loop uvloop --http httptools --no-access-log
 app = create_app()
\ No newline at end of file
@@ -0,0 +1,14 @@
+from starlette.middleware.cors import CORSMiddleware
+from starlette.types import Receive, Scope, Send
+
+
+class OriginCORSMiddleware(CORSMiddleware):
+    """CORSMiddleware that hands requests without an Origin header straight to the app"""
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        # Server-to-server calls and health probes carry no Origin, so skip
+        # building Headers and matching CORS rules for them
+        if scope["type"] == "http" and any(name == b"origin" for name, _ in scope["headers"]):
+            await super().__call__(scope, receive, send)
+        else:
+            await self.app(scope, receive, send)
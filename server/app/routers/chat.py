@@ -1,18 +1,34 @@
-import os
-from fastapi import APIRouter, HTTPException
+import asyncio
+from cachetools import TTLCache
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
+from twilio.base.exceptions import TwilioRestException
 from twilio.rest import Client
 from twilio.jwt.access_token import AccessToken
 from twilio.jwt.access_token.grants import ChatGrant
 
-router = APIRouter()
+from cache import cached_fetch, etag, not_modified
+from config import settings
+from routing import ORJSONRoute
+from streaming import cached_encoder, stream_json_list
 
-def get_twilio_client() -> Client:
-    ACCOUNT_SID = os.getenv("TWILIO_ACCOUNT_SID")
-    AUTH_TOKEN = os.getenv("TWILIO_AUTH_TOKEN")
-    if not ACCOUNT_SID or not AUTH_TOKEN:
-        raise HTTPException(status_code=500, detail="Twilio credentials not configured")
-    return Client(ACCOUNT_SID, AUTH_TOKEN)
+router = APIRouter(route_class=ORJSONRoute)
+
+# friendly_name -> conversation sid, so repeat joins skip the list scan
+_conv_cache: TTLCache = TTLCache(maxsize=1024, ttl=300)
+
+# (identity, service_sid) -> JWT, reused until 10 minutes before it expires
+_token_cache: TTLCache = TTLCache(maxsize=4096, ttl=3000)
+
+# conversation sid -> in-flight/completed fetch, collapses bursts of polling reads
+_fetch_cache: TTLCache = TTLCache(maxsize=1024, ttl=5)
+
+# Bulk deletes use at most half of the Twilio transport's 64-connection pool
+_delete_semaphore = asyncio.Semaphore(32)
+
+async def twilio_client(request: Request) -> Client:
+    return request.app.state.twilio
 
 
 class TokenRequest(BaseModel):
@@ -39,107 +55,111 @@ class SendMessageRequest(BaseModel):
     body: str
 
 
-@router.post("/token")
-def get_chat_token(request: TokenRequest):
+class BulkDeleteRequest(BaseModel):
+    sids: list[str]
+
+
+def _conv_view(conv) -> dict:
+    return {
+        "sid": conv.sid,
+        "friendly_name": conv.friendly_name,
+        "date_created": conv.date_created,
+        "state": conv.state
+    }
+
 
-    # Twilio credentials from environment
-    ACCOUNT_SID = os.getenv("TWILIO_ACCOUNT_SID")
-    API_KEY_SID = os.getenv("TWILIO_API_KEY_SID")
-    API_KEY_SECRET = os.getenv("TWILIO_API_KEY_SECRET")
-    CONVERSATIONS_SERVICE_SID = os.getenv("TWILIO_CONVERSATIONS_SERVICE_SID")
+def _message_view(msg) -> dict:
+    return {
+        "sid": msg.sid,
+        "author": msg.author,
+        "body": msg.body,
+        "date_created": msg.date_created
+    }
 
+
+_CHAT_GRANT = ChatGrant(service_sid=settings.conversations_service_sid)
+
+_encode_conv = cached_encoder(_conv_view)
+_encode_message = cached_encoder(_message_view)
+
+
+@router.post("/token")
+async def get_chat_token(request: TokenRequest):
     """Generate an access token for Twilio Conversations"""
-    if not all([ACCOUNT_SID, API_KEY_SID, API_KEY_SECRET, CONVERSATIONS_SERVICE_SID]):
-        raise HTTPException(status_code=500, detail="Twilio credentials not fully configured")
-    
-    try:
+    key = (request.identity, settings.conversations_service_sid)
+    jwt = _token_cache.get(key)
+    if jwt is None:
         token = AccessToken(
-            ACCOUNT_SID,
-            API_KEY_SID,
-            API_KEY_SECRET,
+            settings.account_sid,
+            settings.api_key_sid,
+            settings.api_key_secret,
             identity=request.identity,
             ttl=3600
         )
+        token.add_grant(_CHAT_GRANT)
+        jwt = _token_cache[key] = token.to_jwt()
 
-        chat_grant = ChatGrant(service_sid=CONVERSATIONS_SERVICE_SID)
-        token.add_grant(chat_grant)
-
-        return {
-            "token": token.to_jwt(),
-            "identity": request.identity
-        }
-    except Exception as e:
-        print(e)
-        raise HTTPException(status_code=500, detail=str(e)) 
+    return {
+        "token": jwt,
+        "identity": request.identity
+    }
 
 
 @router.post("/conversations")
-def create_conversation(request: ConversationRequest):
+async def create_conversation(request: ConversationRequest, client: Client = Depends(twilio_client)):
     """Create a new conversation"""
-    client = get_twilio_client()
-
     try:
-        conversation = client.conversations.v1.conversations.create(
+        conversation = await client.conversations.v1.conversations.create_async(
             friendly_name=request.friendly_name
         )
-        return {
-            "sid": conversation.sid,
-            "friendly_name": conversation.friendly_name,
-            "date_created": conversation.date_created.isoformat() if conversation.date_created else None,
-            "state": conversation.state
-        }
+        return _conv_view(conversation)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.get("/conversations")
-def list_conversations():
+async def list_conversations(client: Client = Depends(twilio_client)):
     """List all conversations"""
-    client = get_twilio_client()
-
     try:
-        conversations = client.conversations.v1.conversations.list(limit=50)
-        return {
-            "conversations": [
-                {
-                    "sid": conv.sid,
-                    "friendly_name": conv.friendly_name,
-                    "date_created": conv.date_created.isoformat() if conv.date_created else None,
-                    "state": conv.state
-                }
-                for conv in conversations
-            ]
-        }
+        conversations = await client.conversations.v1.conversations.stream_async(limit=50)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+    return stream_json_list("conversations", conversations, _encode_conv)
+
 
 @router.get("/conversations/{conversation_sid}")
-def get_conversation(conversation_sid: str):
+async def get_conversation(
+    conversation_sid: str,
+    response: Response,
+    if_none_match: str | None = Header(None),
+    client: Client = Depends(twilio_client)
+):
     """Get a specific conversation"""
-    client = get_twilio_client()
-
     try:
-        conversation = client.conversations.v1.conversations(conversation_sid).fetch()
-        return {
-            "sid": conversation.sid,
-            "friendly_name": conversation.friendly_name,
-            "date_created": conversation.date_created.isoformat() if conversation.date_created else None,
-            "state": conversation.state
-        }
+        conversation = await cached_fetch(
+            _fetch_cache,
+            conversation_sid,
+            client.conversations.v1.conversations(conversation_sid).fetch_async
+        )
     except Exception as e:
         raise HTTPException(status_code=404, detail=str(e))
 
+    tag = etag(conversation.sid, conversation.date_updated)
+    if not_modified(if_none_match, tag):
+        return Response(status_code=304, headers={"ETag": tag})
+
+    response.headers["ETag"] = tag
+    return _conv_view(conversation)
+
 
 @router.post("/conversations/join")
-def join_conversation(request: JoinConversationRequest):
+async def join_conversation(request: JoinConversationRequest, client: Client = Depends(twilio_client)):
     """Add a participant to a conversation"""
-    client = get_twilio_client()
-
     try:
-        participant = client.conversations.v1.conversations(
+        participant = await client.conversations.v1.conversations(
             request.conversation_sid
-        ).participants.create(identity=request.identity)
+        ).participants.create_async(identity=request.identity)
 
         return {
             "sid": participant.sid,
@@ -150,79 +170,97 @@ def join_conversation(request: JoinConversationRequest):
         raise HTTPException(status_code=400, detail=str(e))
 
 
+async def find_conversation_by_name(client: Client, name: str):
+    """Scan conversations for a friendly_name match and cache its sid"""
+    # Conversations can't be filtered by friendly_name server-side, so stream
+    # one full page and stop at the first match instead of building the list
+    conversations = await client.conversations.v1.conversations.stream_async(limit=100, page_size=100)
+    async for conv in conversations:
+        if conv.friendly_name == name:
+            _conv_cache[name] = conv.sid
+            return conv
+
+    return None
+
+
+async def add_participant(client: Client, conversation_sid: str, identity: str):
+    """Add a participant to a conversation (may already exist)"""
+    try:
+        await client.conversations.v1.conversations(
+            conversation_sid
+        ).participants.create_async(identity=identity)
+    except Exception:
+        # Participant might already exist, that's ok
+        pass
+
+
 @router.post("/conversations/join-by-name")
-def join_or_create_conversation(request: JoinByNameRequest):
+async def join_or_create_conversation(request: JoinByNameRequest, client: Client = Depends(twilio_client)):
     """Find or create a conversation by name, then add participant"""
-    client = get_twilio_client()
-
     try:
-        # Try to find existing conversation by friendly_name
-        conversations = client.conversations.v1.conversations.list(limit=100)
         conversation = None
 
-        for conv in conversations:
-            if conv.friendly_name == request.conversation_name:
-                conversation = conv
-                break
+        sid = _conv_cache.get(request.conversation_name)
+        if sid:
+            # The sid is already known, so the fetch and participant add can overlap
+            conversation, _ = await asyncio.gather(
+                client.conversations.v1.conversations(sid).fetch_async(),
+                add_participant(client, sid, request.identity),
+                return_exceptions=True
+            )
+            if isinstance(conversation, TwilioRestException):
+                # Conversation was deleted elsewhere, fall back to a scan
+                _conv_cache.pop(request.conversation_name, None)
+                conversation = None
+            elif isinstance(conversation, BaseException):
+                raise conversation
 
-        # Create if not found
         if not conversation:
-            conversation = client.conversations.v1.conversations.create(
-                friendly_name=request.conversation_name
-            )
+            conversation = await find_conversation_by_name(client, request.conversation_name)
 
-        # Try to add participant (may already exist)
-        try:
-            client.conversations.v1.conversations(
-                conversation.sid
-            ).participants.create(identity=request.identity)
-        except Exception:
-            # Participant might already exist, that's ok
-            pass
+            # Create if not found
+            if not conversation:
+                conversation = await client.conversations.v1.conversations.create_async(
+                    friendly_name=request.conversation_name
+                )
+                _conv_cache[request.conversation_name] = conversation.sid
 
-        return {
-            "sid": conversation.sid,
-            "friendly_name": conversation.friendly_name,
-            "date_created": conversation.date_created.isoformat() if conversation.date_created else None,
-            "state": conversation.state
-        }
+            await add_participant(client, conversation.sid, request.identity)
+
+        return _conv_view(conversation)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.get("/conversations/{conversation_sid}/participants")
-def list_participants(conversation_sid: str):
+async def list_participants(conversation_sid: str, client: Client = Depends(twilio_client)):
     """List participants in a conversation"""
-    client = get_twilio_client()
-
     try:
-        participants = client.conversations.v1.conversations(
+        participants = await client.conversations.v1.conversations(
             conversation_sid
-        ).participants.list()
+        ).participants.list_async()
 
-        return {
+        return ORJSONResponse({
             "participants": [
                 {
                     "sid": p.sid,
                     "identity": p.identity,
-                    "date_created": p.date_created.isoformat() if p.date_created else None
+                    "date_created": p.date_created
                 }
                 for p in participants
             ]
-        }
+        })
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.post("/messages")
-def send_message(request: SendMessageRequest):
+async def send_message(request: SendMessageRequest, client: Client = Depends(twilio_client)):
     """Send a message to a conversation"""
-    client = get_twilio_client()
-
     try:
-        message = client.conversations.v1.conversations(
+        message = await client.conversations.v1.conversations(
             request.conversation_sid
-        ).messages.create(
+        ).messages.create_async(
             author=request.author,
             body=request.body
         )
@@ -232,44 +270,59 @@ def send_message(request: SendMessageRequest):
             "conversation_sid": message.conversation_sid,
             "author": message.author,
             "body": message.body,
-            "date_created": message.date_created.isoformat() if message.date_created else None
+            "date_created": message.date_created
         }
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.get("/conversations/{conversation_sid}/messages")
-def get_messages(conversation_sid: str):
+async def get_messages(conversation_sid: str, client: Client = Depends(twilio_client)):
     """Get messages from a conversation"""
-    client = get_twilio_client()
-
     try:
-        messages = client.conversations.v1.conversations(
+        messages = await client.conversations.v1.conversations(
             conversation_sid
-        ).messages.list(limit=100)
-
-        return {
-            "messages": [
-                {
-                    "sid": msg.sid,
-                    "author": msg.author,
-                    "body": msg.body,
-                    "date_created": msg.date_created.isoformat() if msg.date_created else None
-                }
-                for msg in messages
-            ]
-        }
+        ).messages.stream_async(limit=100)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+    return stream_json_list("messages", messages, _encode_message)
+
+
+def forget_conversation(conversation_sid: str):
+    """Drop a deleted conversation from the local caches"""
+    _fetch_cache.pop(conversation_sid, None)
+    for name, sid in list(_conv_cache.items()):
+        if sid == conversation_sid:
+            del _conv_cache[name]
+
 
 @router.delete("/conversations/{conversation_sid}")
-def delete_conversation(conversation_sid: str):
+async def delete_conversation(conversation_sid: str, client: Client = Depends(twilio_client)):
     """Delete a conversation"""
-    client = get_twilio_client()
-
     try:
-        client.conversations.v1.conversations(conversation_sid).delete()
+        await client.conversations.v1.conversations(conversation_sid).delete_async()
+        forget_conversation(conversation_sid)
         return {"success": True, "message": "Conversation deleted"}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/conversations/bulk-delete")
+async def bulk_delete_conversations(request: BulkDeleteRequest, client: Client = Depends(twilio_client)):
+    """Delete several conversations concurrently"""
+    async def delete(sid: str):
+        async with _delete_semaphore:
+            await client.conversations.v1.conversations(sid).delete_async()
+        forget_conversation(sid)
+
+    results = await asyncio.gather(*[delete(sid) for sid in request.sids], return_exceptions=True)
+
+    return {
+        "deleted": [sid for sid, result in zip(request.sids, results) if result is None],
+        "failed": [
+            {"sid": sid, "error": str(result)}
+            for sid, result in zip(request.sids, results)
+            if isinstance(result, Exception)
+        ]
+    }
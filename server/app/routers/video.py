@@ -1,18 +1,26 @@
-import os
-from fastapi import APIRouter, HTTPException
+from cachetools import TTLCache
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
 from twilio.rest import Client
 from twilio.jwt.access_token import AccessToken
 from twilio.jwt.access_token.grants import VideoGrant
 
-router = APIRouter()
+from cache import cached_fetch, etag, not_modified
+from config import settings
+from routing import ORJSONRoute
+from streaming import cached_encoder, stream_json_list
 
-def get_twilio_client() -> Client:
-    ACCOUNT_SID = os.getenv("TWILIO_ACCOUNT_SID")
-    AUTH_TOKEN = os.getenv("TWILIO_AUTH_TOKEN")
-    if not ACCOUNT_SID or not AUTH_TOKEN:
-        raise HTTPException(status_code=500, detail="Twilio credentials not configured")
-    return Client(ACCOUNT_SID, AUTH_TOKEN)
+router = APIRouter(route_class=ORJSONRoute)
+
+# (identity, room_name) -> JWT, reused until 10 minutes before it expires
+_token_cache: TTLCache = TTLCache(maxsize=4096, ttl=3000)
+
+# room sid -> in-flight/completed fetch, collapses bursts of polling reads
+_fetch_cache: TTLCache = TTLCache(maxsize=1024, ttl=5)
+
+async def twilio_client(request: Request) -> Client:
+    return request.app.state.twilio
 
 
 class TokenRequest(BaseModel):
@@ -25,133 +33,118 @@ class RoomRequest(BaseModel):
     room_type: str = "group"  # "peer-to-peer", "group", or "group-small"
 
 
-@router.post("/token")
-def get_video_token(request: TokenRequest):
+def _room_view(room) -> dict:
+    return {
+        "sid": room.sid,
+        "unique_name": room.unique_name,
+        "status": room.status,
+        "type": room.type,
+        "date_created": room.date_created,
+        "duration": room.duration
+    }
 
-    # Twilio credentials from environment
-    ACCOUNT_SID = os.getenv("TWILIO_ACCOUNT_SID")
-    API_KEY_SID = os.getenv("TWILIO_API_KEY_SID")
-    API_KEY_SECRET = os.getenv("TWILIO_API_KEY_SECRET")
 
-    """Generate an access token for Twilio Video"""
-    if not all([ACCOUNT_SID, API_KEY_SID, API_KEY_SECRET]):
-        raise HTTPException(status_code=500, detail="Twilio credentials not fully configured")
+_encode_room = cached_encoder(_room_view)
 
-    token = AccessToken(
-        ACCOUNT_SID,
-        API_KEY_SID,
-        API_KEY_SECRET,
-        identity=request.identity,
-        ttl=3600
-    )
 
-    video_grant = VideoGrant(room=request.room_name)
-    token.add_grant(video_grant)
+@router.post("/token")
+async def get_video_token(request: TokenRequest):
+    """Generate an access token for Twilio Video"""
+    key = (request.identity, request.room_name)
+    jwt = _token_cache.get(key)
+    if jwt is None:
+        token = AccessToken(
+            settings.account_sid,
+            settings.api_key_sid,
+            settings.api_key_secret,
+            identity=request.identity,
+            ttl=3600
+        )
+
+        video_grant = VideoGrant(room=request.room_name)
+        token.add_grant(video_grant)
+        jwt = _token_cache[key] = token.to_jwt()
 
     return {
-        "token": token.to_jwt(),
+        "token": jwt,
         "identity": request.identity,
         "room_name": request.room_name
     }
 
 
 @router.post("/rooms")
-def create_room(request: RoomRequest):
+async def create_room(request: RoomRequest, client: Client = Depends(twilio_client)):
     """Create a new video room"""
-    client = get_twilio_client()
-
     try:
-        room = client.video.v1.rooms.create(
+        room = await client.video.v1.rooms.create_async(
             unique_name=request.room_name,
             type=request.room_type
         )
 
-        return {
-            "sid": room.sid,
-            "unique_name": room.unique_name,
-            "status": room.status,
-            "type": room.type,
-            "date_created": room.date_created.isoformat() if room.date_created else None
-        }
+        return _room_view(room)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.get("/rooms")
-def list_rooms(status: str = "in-progress"):
+async def list_rooms(status: str = "in-progress", client: Client = Depends(twilio_client)):
     """List video rooms"""
-    client = get_twilio_client()
-
     try:
-        rooms = client.video.v1.rooms.list(status=status, limit=50)
-
-        return {
-            "rooms": [
-                {
-                    "sid": room.sid,
-                    "unique_name": room.unique_name,
-                    "status": room.status,
-                    "type": room.type,
-                    "date_created": room.date_created.isoformat() if room.date_created else None,
-                    "duration": room.duration
-                }
-                for room in rooms
-            ]
-        }
+        rooms = await client.video.v1.rooms.stream_async(status=status, limit=50)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+    return stream_json_list("rooms", rooms, _encode_room)
+
 
 @router.get("/rooms/{room_sid}")
-def get_room(room_sid: str):
+async def get_room(
+    room_sid: str,
+    response: Response,
+    if_none_match: str | None = Header(None),
+    client: Client = Depends(twilio_client)
+):
     """Get a specific video room"""
-    client = get_twilio_client()
-
     try:
-        room = client.video.v1.rooms(room_sid).fetch()
-
-        return {
-            "sid": room.sid,
-            "unique_name": room.unique_name,
-            "status": room.status,
-            "type": room.type,
-            "date_created": room.date_created.isoformat() if room.date_created else None,
-            "duration": room.duration
-        }
+        room = await cached_fetch(_fetch_cache, room_sid, client.video.v1.rooms(room_sid).fetch_async)
     except Exception as e:
         raise HTTPException(status_code=404, detail=str(e))
 
+    tag = etag(room.sid, room.date_updated)
+    if not_modified(if_none_match, tag):
+        return Response(status_code=304, headers={"ETag": tag})
+
+    response.headers["ETag"] = tag
+    return _room_view(room)
+
 
 @router.get("/rooms/{room_sid}/participants")
-def list_room_participants(room_sid: str):
+async def list_room_participants(room_sid: str, client: Client = Depends(twilio_client)):
     """List participants in a video room"""
-    client = get_twilio_client()
-
     try:
-        participants = client.video.v1.rooms(room_sid).participants.list()
+        participants = await client.video.v1.rooms(room_sid).participants.list_async()
 
-        return {
+        return ORJSONResponse({
             "participants": [
                 {
                     "sid": p.sid,
                     "identity": p.identity,
                     "status": p.status,
-                    "date_created": p.date_created.isoformat() if p.date_created else None
+                    "date_created": p.date_created
                 }
                 for p in participants
             ]
-        }
+        })
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.post("/rooms/{room_sid}/end")
-def end_room(room_sid: str):
+async def end_room(room_sid: str, client: Client = Depends(twilio_client)):
     """End a video room"""
-    client = get_twilio_client()
-
     try:
-        room = client.video.v1.rooms(room_sid).update(status="completed")
+        room = await client.video.v1.rooms(room_sid).update_async(status="completed")
+        _fetch_cache.pop(room_sid, None)
 
         return {
             "sid": room.sid,
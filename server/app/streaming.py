@@ -0,0 +1,32 @@
+from typing import Any, AsyncIterator, Callable
+
+import orjson
+from cachetools import LRUCache
+from fastapi.responses import StreamingResponse
+
+
+def cached_encoder(view: Callable[[Any], dict], maxsize: int = 1024) -> Callable[[Any], bytes]:
+    """Wrap a view so each (sid, date_updated) version of a record is encoded once"""
+    encoded: LRUCache = LRUCache(maxsize=maxsize)
+
+    def encode(item: Any) -> bytes:
+        key = (item.sid, item.date_updated)
+        data = encoded.get(key)
+        if data is None:
+            data = encoded[key] = orjson.dumps(view(item))
+        return data
+
+    return encode
+
+
+def stream_json_list(key: str, items: AsyncIterator[Any], encode: Callable[[Any], bytes]) -> StreamingResponse:
+    """Stream {"<key>": [...]} to the client one encoded record at a time"""
+    async def body():
+        yield b'{"' + key.encode() + b'":['
+        separator = b""
+        async for item in items:
+            yield separator + encode(item)
+            separator = b","
+        yield b"]}"
+
+    return StreamingResponse(body(), media_type="application/json")
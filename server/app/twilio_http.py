@@ -0,0 +1,65 @@
+import asyncio
+import logging
+from typing import Dict, Optional, Tuple
+
+import httpx
+from twilio.http import AsyncHttpClient
+from twilio.http.response import Response
+
+_logger = logging.getLogger("twilio.async_http_client")
+
+# Only replay requests that are safe to repeat, never message/room creation
+RETRY_METHODS = {"GET", "DELETE"}
+RETRY_STATUSES = {429, 502, 503, 504}
+
+
+class HttpxTwilioHttpClient(AsyncHttpClient):
+    """Async Twilio transport on httpx, multiplexing concurrent calls over HTTP/2"""
+
+    def __init__(self, timeout: float = 15.0, max_retries: int = 2, logger: logging.Logger = _logger):
+        super().__init__(logger, True, timeout)
+        self.max_retries = max_retries
+        self.session = httpx.AsyncClient(
+            http2=True,
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=64, max_keepalive_connections=64, keepalive_expiry=300),
+        )
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        params: Optional[Dict[str, object]] = None,
+        data: Optional[Dict[str, object]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        auth: Optional[Tuple[str, str]] = None,
+        timeout: Optional[float] = None,
+        allow_redirects: bool = False,
+    ) -> Response:
+        if timeout is not None and timeout <= 0:
+            raise ValueError(timeout)
+
+        kwargs = {
+            "method": method.upper(),
+            "url": url,
+            "params": params,
+            "data": data,
+            "headers": headers,
+            "auth": auth,
+            "timeout": timeout or self.timeout,
+            "follow_redirects": allow_redirects,
+        }
+        self.log_request(kwargs)
+
+        attempts = 1 + (self.max_retries if kwargs["method"] in RETRY_METHODS else 0)
+        for attempt in range(attempts):
+            response = await self.session.request(**kwargs)
+            if response.status_code not in RETRY_STATUSES or attempt == attempts - 1:
+                break
+            await asyncio.sleep(0.1 * 2 ** attempt)
+
+        self.log_response(response.status_code, response)
+        return Response(response.status_code, response.text, response.headers)
+
+    async def close(self):
+        await self.session.aclose()